@@ -4,3 +4,9 @@
 '''
 Typograph for LaTeX.
 '''
+
+__version__ = '0.0.1'
+
+from .cli import main  # noqa
+
+__all__ = ['main']
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+.. module:: cli
+   :platform: Independent
+   :synopsis: Command line interface.
+
+.. moduleauthor:: Evgeniy Bastrykov <vporoshok@gmail.com>
+
+Configuration of states is given as ``package.module:factory``,
+see :func:`.config.load_stack`.
+
+'''
+
+import sys
+from argparse import ArgumentParser
+
+from .config import load_stack
+from .manifest import process_directory
+from .server import Client, Server
+from .trace import Trace, replay
+
+
+def batch(args):
+    '''Typeset every line of stdin'''
+
+    lines = (line.rstrip('\n') for line in sys.stdin)
+    if args.connect is None:
+        if args.config is None:
+            parser().error('config or --connect is required')
+
+        stack = load_stack(args.config, True)
+        for result in stack.batch(lines, args.root):
+            sys.stdout.write(''.join(result) + '\n')
+
+        return
+
+    with Client(args.connect) as client:
+        for result in client.batch(lines, args.root):
+            sys.stdout.write(result + '\n')
+
+
+def serve(args):
+    '''Serve requests on Unix socket until interrupted'''
+
+    server = Server(args.socket, args.config, args.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def process(args):
+    '''Typeset changed files of directory and print their paths'''
+
+    for path in process_directory(args.directory, args.config, args.root,
+                                  args.pattern, args.workers):
+        sys.stdout.write(path + '\n')
+
+
+def replay_trace(args):
+    '''Replay trace and print profile'''
+
+    with open(args.trace, 'rb') as stream:
+        trace = Trace.load(stream)
+
+    stack = load_stack(args.config)
+    if args.root is not None:
+        stack.root = args.root
+
+    profile = replay(trace, stack)
+    for name in sorted(profile):
+        sys.stdout.write('{0}\t{1}\t{2}\t{3}\n'.format(name,
+                                                       *profile[name]))
+
+
+def parser():
+    '''Parser of command line arguments'''
+
+    result = ArgumentParser(prog='prettytypo',
+                            description='Typographer for LaTeX')
+    commands = result.add_subparsers(dest='command')
+    commands.required = True
+
+    command = commands.add_parser('batch', help='typeset lines of stdin')
+    command.add_argument('config', nargs='?', help='package.module:factory')
+    command.add_argument('--root', help='root state instead of configured')
+    command.add_argument('--connect', metavar='SOCKET',
+                         help='send lines to server instead of config')
+    command.set_defaults(func=batch)
+
+    command = commands.add_parser('serve', help='run warm workers server')
+    command.add_argument('config', help='package.module:factory')
+    command.add_argument('--socket', required=True, help='path to socket')
+    command.add_argument('--workers', type=int, help='count of workers')
+    command.set_defaults(func=serve)
+
+    command = commands.add_parser('dir', help='typeset changed files')
+    command.add_argument('directory', help='path to directory')
+    command.add_argument('config', help='package.module:factory')
+    command.add_argument('--root', help='root state instead of configured')
+    command.add_argument('--pattern', default='*.tex',
+                         help='pattern of file names')
+    command.add_argument('--workers', type=int, help='count of workers')
+    command.set_defaults(func=process)
+
+    command = commands.add_parser('replay', help='replay binary trace')
+    command.add_argument('trace', help='path to trace')
+    command.add_argument('config', help='package.module:factory')
+    command.add_argument('--root', help='root state instead of configured')
+    command.set_defaults(func=replay_trace)
+
+    return result
+
+
+def main(argv=None):
+    '''Entry point of console script
+
+    Parameters:
+        argv (list of str, optional): arguments, default is None
+            and taken from sys.argv
+
+    '''
+
+    args = parser().parse_args(argv)
+    args.func(args)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+.. module:: config
+   :platform: Independent
+   :synopsis: Loading of states configuration.
+
+.. moduleauthor:: Evgeniy Bastrykov <vporoshok@gmail.com>
+
+Configuration of states is given as ``package.module:factory``, where
+factory is a callable, that returns :class:`.StateStack` with registered
+states. Its :attr:`.StateStack.root` and :attr:`.StateStack.split` are
+used to process texts, unless root is given explicitly.
+
+'''
+
+from importlib import import_module
+
+
+def load_stack(config, text=False):
+    '''Build stack by configuration
+
+    Parameters:
+        config (str): ``package.module:factory``
+        text (bool, optional): stack is used to typeset texts, so its
+            :meth:`.StateStack.batch` must yield results, not edit scripts
+            or trees, default is False
+
+    Returns:
+        :class:`.StateStack`: configured stack
+
+    Raises:
+        ValueError: if config has not factory part or stack collects
+            edits or tree, when text is required
+
+    '''
+
+    module, _, factory = config.partition(':')
+    if not factory:
+
+        raise ValueError('config must be \'module:factory\'')
+
+    stack = getattr(import_module(module), factory)()
+    if text and (stack.edits is not None or stack.tree is not None):
+
+        raise ValueError('config \'{0}\' must build stack without edits '
+                         'and tree to typeset texts'.format(config))
+
+    return stack
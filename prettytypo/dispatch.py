@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+.. module:: dispatch
+   :platform: Independent
+   :synopsis: Generated dispatch loop for state machine.
+
+.. moduleauthor:: Evgeniy Bastrykov <vporoshok@gmail.com>
+
+Generic :meth:`.StateStack.__call__` takes followers of current state
+from :class:`.StateGraph` and looks up their conditions on every chunk.
+For analyzed graph all of this is known in advance, so here we generate
+Python source with one branch per distinct followers list, where
+conditions of live followers are called directly, and compile it.
+
+Branch is selected by identity of :attr:`.StateDefault.followers` of
+current state, so a state with followers changed on instance goes
+through the generic branch, same as in interpreted loop.
+
+'''
+
+from logging import getLogger
+
+
+LOG = getLogger('StateStack.Dispatch')
+
+CACHE_SIZE = 64
+
+_CACHE = {}
+
+HEAD = '''\
+def dispatch(stack, chunk):
+    _stack = stack._stack
+    if not _stack:
+        stack.log.error('stack is empty')
+
+        raise LookupError('Stack stack is empty')
+
+    current = _stack[-1]
+    followers = current.followers
+'''
+
+GENERIC = '''\
+    else:
+        for name, state in stack.graph.followers(current):
+            if state.cond(chunk, current):
+                stack.push(name)
+
+                break
+'''
+
+TAIL = '''\
+    _stack[-1](chunk)
+
+    if _stack[-1].done:
+        stack.pop()
+'''
+
+
+def _key(graph):
+    '''Key of generated code in cache
+
+    Parameters:
+        graph (:class:`.StateGraph`): analyzed states
+
+    Returns:
+        tuple: hashable description of states graph
+
+    Raises:
+        TypeError: if some followers are not hashable
+
+    '''
+
+    return tuple(sorted((ident, tuple(live))
+                        for ident, (_, live) in graph.resolved.items()))
+
+
+def generate(graph):
+    '''Generate source of dispatch function
+
+    Parameters:
+        graph (:class:`.StateGraph`): analyzed states
+
+    Returns:
+        tuple: source (str) and namespace (dict) to execute it in
+
+    '''
+
+    namespace = {}
+    lines = [HEAD]
+    for index, ident in enumerate(sorted(graph.resolved)):
+        followers, live = graph.resolved[ident]
+        namespace['F{0}'.format(index)] = followers
+        lines.append('    {0} followers is F{1}:\n'.format(
+            'elif' if index else 'if', index))
+
+        if not live:
+            lines.append('        pass\n')
+
+        for position, (follower, state) in enumerate(live):
+            suffix = '{0}_{1}'.format(index, position)
+            namespace['K' + suffix] = state.cond
+            namespace['N' + suffix] = follower
+            lines.append('        {0} K{1}(chunk, current):\n'.format(
+                'elif' if position else 'if', suffix))
+            lines.append('            stack.push(N{0})\n'.format(suffix))
+
+    lines.append(GENERIC)
+    lines.append(TAIL)
+
+    return ''.join(lines), namespace
+
+
+def compile_dispatch(graph):
+    '''Build dispatch function for states
+
+    Generated functions are cached by followers lists and resolved
+    state classes of live followers.
+
+    Parameters:
+        graph (:class:`.StateGraph`): analyzed states
+
+    Returns:
+        function: dispatch(stack, chunk) or None if it couldn't be built
+
+    '''
+
+    try:
+        key = _key(graph)
+        if key not in _CACHE:
+            source, namespace = generate(graph)
+            # source is built from fixed templates and index-based names,
+            # states are passed through namespace and never formatted in it
+            # pylint: disable=exec-used
+            exec(compile(source, '<dispatch>', 'exec'), namespace)
+            if len(_CACHE) >= CACHE_SIZE:
+                _CACHE.clear()
+
+            _CACHE[key] = namespace['dispatch']
+
+    except (TypeError, ValueError, SyntaxError, RuntimeError) as err:
+        LOG.warning('can\'t compile dispatch: %s', err)
+        LOG.info('use interpreted loop')
+
+        return None
+
+    return _CACHE[key]
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+.. module:: edits
+   :platform: Independent
+   :synopsis: Ordered edit script of modifications.
+
+.. moduleauthor:: Evgeniy Bastrykov <vporoshok@gmail.com>
+
+Instead of full rewritten text states can report only modifications
+of input. Every edit replaces span of input by data (empty span is
+insertion and empty data is deletion). Edits are kept ordered by input
+offsets, so they can be applied in one pass.
+
+'''
+
+import io
+import os
+from array import array
+from codecs import getincrementalencoder
+from shutil import copymode
+from tempfile import NamedTemporaryFile
+
+
+COPY_SIZE = 1 << 16
+
+
+class EditScript(object):
+    '''Ordered list of edits
+
+    Adjacent edits are merged into one.
+
+    Attributes:
+        starts (array): input offsets of span starts
+        ends (array): input offsets of span ends
+        data (list): replacements of spans, None for deletion
+
+    '''
+
+    def __init__(self):
+        self.starts = array('l')
+        self.ends = array('l')
+        self.data = []
+
+    def __len__(self):
+        '''Count of edits'''
+
+        return len(self.starts)
+
+    def __iter__(self):
+        '''Iterate over edits
+
+        Returns:
+            iterator: start, end and data of every edit
+
+        '''
+
+        return zip(self.starts, self.ends, self.data)
+
+    def add(self, start, end, data=None):
+        '''Add edit to script
+
+        Parameters:
+            start (int): input offset of span start
+            end (int): input offset of span end
+            data (container, optional): replacement, default is None
+                and span is deleted
+
+        Raises:
+            ValueError: if span ends before start or goes before
+                the last edit
+
+        '''
+
+        if end < start or (self.ends and start < self.ends[-1]):
+
+            raise ValueError('edit {0}:{1} is out of order'
+                             .format(start, end))
+
+        if self.ends and start == self.ends[-1]:
+            self.ends[-1] = end
+            if self.data[-1] is None:
+                self.data[-1] = data
+            elif data is not None:
+                self.data[-1] = self.data[-1] + data
+
+            return
+
+        self.starts.append(start)
+        self.ends.append(end)
+        self.data.append(data)
+
+    def apply(self, source):
+        '''Apply edits to source
+
+        Parameters:
+            source (container): edited input
+
+        Returns:
+            container: source with all edits
+
+        '''
+
+        result = source[:0]
+        position = 0
+        for start, end, data in self:
+            result += source[position:start]
+            if data is not None:
+                result += data
+
+            position = end
+
+        result += source[position:]
+
+        return result
+
+    def encode(self, source, encoding):
+        '''Convert script of text edits to bytes
+
+        Source is encoded incrementally, so byte offsets include BOM
+        of encodings like 'utf-8-sig' or 'utf-16' and data goes without it.
+
+        Parameters:
+            source (str): edited text
+            encoding (str): encoding of bytes
+
+        Returns:
+            :class:`.EditScript`: edits with byte offsets and bytes data
+
+        '''
+
+        source_encoder = getincrementalencoder(encoding)()
+        data_encoder = getincrementalencoder(encoding)()
+        data_encoder.encode(source[:0])
+
+        result = EditScript()
+        position = offset = 0
+        for start, end, data in self:
+            offset += len(source_encoder.encode(source[position:start]))
+            size = len(source_encoder.encode(source[start:end]))
+            result.add(offset, offset + size,
+                       None if data is None else data_encoder.encode(data))
+            offset += size
+            position = end
+
+        return result
+
+    def apply_file(self, path, encoding=None):
+        '''Apply edits to file
+
+        If every edit keeps length of its span in bytes, edited spans are
+        overwritten in place. Otherwise the file is copied with edits
+        to temporary file in the same directory that replaces it.
+
+        Parameters:
+            path (str): path to file
+            encoding (str, optional): encoding of file, default is None
+                and offsets are in bytes and data must be bytes. If given,
+                offsets are in characters of file decoded without newlines
+                translation and data is text, they are converted
+                by :meth:`.encode`.
+
+        Raises:
+            TypeError: if encoding is not given for text data
+
+        '''
+
+        if encoding is not None:
+            with io.open(path, encoding=encoding, newline='') as source:
+
+                return self.encode(source.read(), encoding).apply_file(path)
+
+        if any(not isinstance(data, bytes)
+               for data in self.data if data is not None):
+
+            raise TypeError('encoding is required for text edits')
+
+        if all(data is not None and len(data) == end - start
+               for start, end, data in self):
+            with open(path, 'r+b') as target:
+                for start, _, data in self:
+                    target.seek(start)
+                    target.write(data)
+
+            return
+
+        directory = os.path.dirname(os.path.abspath(path))
+        with open(path, 'rb') as source:
+            with NamedTemporaryFile(dir=directory, delete=False) as target:
+                position = 0
+                for start, end, data in self:
+                    _copy(source, target, start - position)
+                    if data is not None:
+                        target.write(data)
+
+                    source.seek(end)
+                    position = end
+
+                _copy(source, target, None)
+
+        copymode(path, target.name)
+        os.rename(target.name, path)
+
+    def to_patch(self):
+        '''Edits as list of dicts to send to editors
+
+        Returns:
+            list of dict: start, end and text of every edit
+
+        '''
+
+        return [{'start': start, 'end': end,
+                 'text': data if data is not None else ''}
+                for start, end, data in self]
+
+
+def _copy(source, target, size):
+    '''Copy size bytes (or all rest if None) from source to target'''
+
+    while size is None or size > 0:
+        block = source.read(COPY_SIZE if size is None
+                            else min(size, COPY_SIZE))
+        if not block:
+            break
+
+        target.write(block)
+        if size is not None:
+            size -= len(block)
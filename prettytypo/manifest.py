@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+.. module:: manifest
+   :platform: Independent
+   :synopsis: Change-aware processing of directories.
+
+.. moduleauthor:: Evgeniy Bastrykov <vporoshok@gmail.com>
+
+Manifest keeps hashes of processed files and fingerprint of states
+configuration. Files with same hash are skipped, the others are processed
+in place by pool of workers. If configuration has changed, all files are
+processed again.
+
+'''
+
+import io
+import json
+import os
+from fnmatch import fnmatch
+from hashlib import sha1
+from inspect import getmodule, getsource
+from multiprocessing import Pool
+from tempfile import NamedTemporaryFile
+
+from . import __version__
+from .config import load_stack
+from .worker import init_worker, work
+
+
+MANIFEST = '.prettytypo.json'
+
+
+def _source(obj):
+    '''Source of module, class or function, empty if it is unavailable'''
+
+    try:
+
+        return getsource(obj)
+
+    except (IOError, TypeError):
+
+        return ''
+
+
+def fingerprint(stack, root=None):
+    '''Fingerprint of states configuration
+
+    It depends on package version, on effective root name, on identity
+    and source of :attr:`.StateStack.split`, on name, class and followers
+    of every registered state and on source of modules, where states
+    and splitter are defined, so helpers used by them are counted too.
+
+    Parameters:
+        stack (:class:`.StateStack`): configured stack
+        root (str, optional): name of root state, default is None
+            and :attr:`.StateStack.root` is used
+
+    Returns:
+        str: hex digest
+
+    '''
+
+    digest = sha1(__version__.encode('utf-8'))
+    split = stack.split
+    digest.update(json.dumps([
+        stack.root if root is None else root,
+        getattr(split, '__module__', None),
+        getattr(split, '__name__', repr(split)),
+        _source(split)]).encode('utf-8'))
+
+    modules = set([getmodule(split)])
+    for name in sorted(stack.states):
+        state = stack.states[name]
+        modules.add(getmodule(state))
+        digest.update(json.dumps([
+            name, state.__module__, state.__name__, state.real_name,
+            list(state.followers)]).encode('utf-8'))
+
+    modules.discard(None)
+    for module in sorted(modules, key=lambda module: module.__name__):
+        digest.update(json.dumps([module.__name__, _source(module)])
+                      .encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def write_atomic(path, data):
+    '''Replace file content by data through temporary file
+
+    Parameters:
+        path (str): path to file
+        data (bytes): new content
+
+    '''
+
+    directory = os.path.dirname(os.path.abspath(path))
+    with NamedTemporaryFile(dir=directory, delete=False) as target:
+        target.write(data)
+
+    if os.path.exists(path):
+        os.chmod(target.name, os.stat(path).st_mode & 0o777)
+
+    os.rename(target.name, path)
+
+
+class Manifest(object):
+    '''Hashes of processed files
+
+    Parameters:
+        path (str): path to manifest file, it is created on :meth:`.save`
+
+    Attributes:
+        fingerprint (str): fingerprint of configuration
+        files (dict): relative path to hex digest of content
+
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.fingerprint = None
+        self.files = {}
+        if os.path.exists(path):
+            with io.open(path, encoding='utf-8') as source:
+                data = json.load(source)
+
+            self.fingerprint = data['fingerprint']
+            self.files = data['files']
+
+    def save(self):
+        '''Write manifest atomically'''
+
+        data = {'fingerprint': self.fingerprint, 'files': self.files}
+        write_atomic(self.path, json.dumps(data, indent=1, sort_keys=True)
+                     .encode('utf-8'))
+
+
+def typeset_file(path, root):
+    '''Typeset file in place in worker process
+
+    File is decoded as is, without translation of newlines.
+
+    Parameters:
+        path (str): path to file in UTF-8
+        root (str): name of root state or None for configured one
+
+    Returns:
+        str: hex digest of content on disk
+
+    '''
+
+    with open(path, 'rb') as source:
+        original = source.read()
+
+    data = work(root, [original.decode('utf-8')])[0].encode('utf-8')
+    if data != original:
+        write_atomic(path, data)
+
+    return sha1(data).hexdigest()
+
+
+def _typeset(args):
+    '''Unpack arguments of :func:`.typeset_file` for pool'''
+
+    return typeset_file(*args)
+
+
+def process_directory(directory, config, root=None, pattern='*.tex',
+                      workers=None):
+    '''Typeset changed files of directory in place
+
+    Parameters:
+        directory (str): path to directory, manifest is stored in it
+        config (str): ``package.module:factory``
+        root (str, optional): name of root state, default is None
+            and configured root is used
+        pattern (str, optional): shell pattern of file names,
+            default is '*.tex'
+        workers (int, optional): count of worker processes, default is None
+            and count of CPUs is used
+
+    Returns:
+        list of str: relative paths of processed files
+
+    '''
+
+    manifest = Manifest(os.path.join(directory, MANIFEST))
+    current = fingerprint(load_stack(config, True), root)
+    if manifest.fingerprint != current:
+        manifest.fingerprint = current
+        manifest.files = {}
+
+    found = {}
+    for path, _, names in os.walk(directory):
+        for name in names:
+            if fnmatch(name, pattern):
+                full = os.path.join(path, name)
+                with open(full, 'rb') as source:
+                    found[os.path.relpath(full, directory)] = sha1(
+                        source.read()).hexdigest()
+
+    changed = sorted(name for name, digest in found.items()
+                     if manifest.files.get(name) != digest)
+    files = dict((name, manifest.files[name]) for name in found
+                 if name in manifest.files)
+
+    if changed:
+        pool = Pool(workers, init_worker, (config,))
+        try:
+            digests = pool.map(_typeset, [(os.path.join(directory, name),
+                                           root) for name in changed])
+        finally:
+            pool.terminate()
+            pool.join()
+
+        files.update(zip(changed, digests))
+
+    manifest.files = files
+    manifest.save()
+
+    return changed
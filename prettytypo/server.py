@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+.. module:: server
+   :platform: Independent
+   :synopsis: Warm worker daemon over Unix socket.
+
+.. moduleauthor:: Evgeniy Bastrykov <vporoshok@gmail.com>
+
+Server keeps a pool of worker processes, every one has configured
+:class:`.StateStack` built once at start. Requests and responses are JSON
+objects, every one is prefixed by its length (4 bytes, big-endian).
+Request is ``{"root": name or null, "texts": [...]}`` and response is
+``{"results": [...]}`` or ``{"error": message}``.
+
+'''
+
+import json
+import os
+from itertools import islice
+from logging import getLogger
+from multiprocessing import Pool
+from socket import AF_UNIX, SOCK_STREAM, socket
+from struct import Struct
+
+try:
+    from socketserver import (StreamRequestHandler, ThreadingMixIn,
+                              UnixStreamServer)
+except ImportError:  # pragma: no cover
+    from SocketServer import (StreamRequestHandler, ThreadingMixIn,
+                              UnixStreamServer)
+
+from .config import load_stack
+from .worker import init_worker, work
+
+
+LENGTH = Struct('>I')
+
+SLICE = 1024
+
+
+def send_frame(stream, data):
+    '''Write JSON frame
+
+    Parameters:
+        stream (file): binary stream
+        data (object): JSON serializable data
+
+    '''
+
+    data = json.dumps(data).encode('utf-8')
+    stream.write(LENGTH.pack(len(data)) + data)
+    stream.flush()
+
+
+def recv_frame(stream):
+    '''Read JSON frame
+
+    Parameters:
+        stream (file): binary stream
+
+    Returns:
+        object: data or None if stream is closed
+
+    Raises:
+        ValueError: if stream is closed inside frame
+
+    '''
+
+    head = stream.read(LENGTH.size)
+    if not head:
+
+        return None
+
+    if len(head) != LENGTH.size:
+
+        raise ValueError('frame is truncated')
+
+    size, = LENGTH.unpack(head)
+    data = stream.read(size)
+    if len(data) != size:
+
+        raise ValueError('frame is truncated')
+
+    return json.loads(data.decode('utf-8'))
+
+
+class Handler(StreamRequestHandler):
+    '''Handler of one connection, it serves requests until it is closed'''
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_frame(self.rfile)
+            except ValueError as err:
+                self.server.log.error('bad request: %s', err)
+
+                break
+
+            if request is None:
+                break
+
+            try:
+                response = {'results': self.server.pool.apply(
+                    work, (request.get('root'), request['texts']))}
+            except Exception as err:  # pylint: disable=broad-except
+                self.server.log.error('request failed: %s', err)
+                response = {'error': str(err)}
+
+            send_frame(self.wfile, response)
+
+
+class Server(ThreadingMixIn, UnixStreamServer):
+    '''Server with pool of warm workers
+
+    Parameters:
+        path (str): path to Unix socket
+        config (str): ``package.module:factory``
+        workers (int, optional): count of worker processes, default is None
+            and count of CPUs is used
+
+    Raises:
+        ValueError: if config doesn't build stack to typeset texts,
+            see :func:`.config.load_stack`
+
+    '''
+
+    daemon_threads = True
+
+    def __init__(self, path, config, workers=None):
+        load_stack(config, True)
+        self.log = getLogger('StateStack.Server')
+        self.pool = None
+        self._bound = False
+        UnixStreamServer.__init__(self, path, Handler)
+        self.pool = Pool(workers, init_worker, (config,))
+
+    def server_bind(self):
+        '''Bind socket and remember that socket file is ours'''
+
+        UnixStreamServer.server_bind(self)
+        self._bound = True
+
+    def server_close(self):
+        '''Close socket, stop workers and remove socket file if it is ours'''
+
+        UnixStreamServer.server_close(self)
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+
+        if self._bound and os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+            self._bound = False
+
+
+class Client(object):
+    '''Client of :class:`.Server`
+
+    It has same :meth:`.batch` as :class:`.StateStack`.
+
+    Parameters:
+        path (str): path to Unix socket
+
+    '''
+
+    def __init__(self, path):
+        self._socket = socket(AF_UNIX, SOCK_STREAM)
+        self._socket.connect(path)
+        self._stream = self._socket.makefile('rwb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def batch(self, texts, root=None):
+        '''Typeset texts on server
+
+        Texts are sent by slices of :data:`.SLICE` texts.
+
+        Parameters:
+            texts (iterable of str): texts to process
+            root (str, optional): name of root state, default is None
+                and configured root is used
+
+        Yields:
+            str: result for every text
+
+        Raises:
+            RuntimeError: if server has failed to process request
+
+        '''
+
+        texts = iter(texts)
+        while True:
+            part = list(islice(texts, SLICE))
+            if not part:
+                break
+
+            send_frame(self._stream, {'root': root, 'texts': part})
+            response = recv_frame(self._stream)
+            if response is None:
+
+                raise RuntimeError('server has closed connection')
+
+            if 'error' in response:
+
+                raise RuntimeError(response['error'])
+
+            for result in response['results']:
+                yield result
+
+    def close(self):
+        '''Close connection'''
+
+        self._stream.close()
+        self._socket.close()
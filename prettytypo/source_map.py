@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+.. module:: source_map
+   :platform: Independent
+   :synopsis: Run-length map from output back to input offsets.
+
+.. moduleauthor:: Evgeniy Bastrykov <vporoshok@gmail.com>
+
+Map is a sequence of runs. Every run covers a range of output
+and has input offset of its start and step: 1 for data copied from input
+(output position moves together with input) and 0 for data generated
+by states (all run is mapped to one input position). Runs are stored
+in parallel arrays and adjacent runs are merged.
+
+'''
+
+from array import array
+from bisect import bisect_right
+
+
+class SourceMap(object):
+    '''Map from output to input offsets
+
+    Attributes:
+        length (int): length of mapped output
+        outputs (array): output offsets of runs
+        inputs (array): input offsets of runs
+        steps (array): steps of runs
+
+    '''
+
+    def __init__(self):
+        self.length = 0
+        self.outputs = array('l')
+        self.inputs = array('l')
+        self.steps = array('b')
+
+    def __len__(self):
+        '''Count of runs'''
+
+        return len(self.outputs)
+
+    def __iter__(self):
+        '''Iterate over runs
+
+        Yields:
+            tuple: output offset, input offset, length and step of run
+
+        '''
+
+        ends = self.outputs[1:]
+        ends.append(self.length)
+        for run in zip(self.outputs, self.inputs, ends, self.steps):
+            yield run[0], run[1], run[2] - run[0], run[3]
+
+    def append(self, length, offset, step=1):
+        '''Append run to map
+
+        Parameters:
+            length (int): length of output
+            offset (int): input offset of run start
+            step (int, optional): 1 for copied and 0 for generated data,
+                default is 1
+
+        '''
+
+        if not length:
+            return
+
+        if self.outputs and self.steps[-1] == step:
+            shift = (self.length - self.outputs[-1]) * step
+            if self.inputs[-1] + shift == offset:
+                self.length += length
+
+                return
+
+        self.outputs.append(self.length)
+        self.inputs.append(offset)
+        self.steps.append(step)
+        self.length += length
+
+    def extend(self, other):
+        '''Append all runs of other map
+
+        Parameters:
+            other (:class:`.SourceMap`): map of following output
+
+        '''
+
+        if not other.outputs:
+            return
+
+        start = self.length
+        self.append(other.outputs[1] if len(other) > 1 else other.length,
+                    other.inputs[0], other.steps[0])
+        if len(other) > 1:
+            self.outputs.extend(array('l', [start + output for output
+                                            in other.outputs[1:]]))
+            self.inputs.extend(other.inputs[1:])
+            self.steps.extend(other.steps[1:])
+            self.length = start + other.length
+
+    def lookup(self, position):
+        '''Input offset of output position
+
+        Parameters:
+            position (int): output position
+
+        Returns:
+            int: input offset
+
+        Raises:
+            IndexError: if position is out of mapped output
+
+        '''
+
+        if not 0 <= position < self.length:
+
+            raise IndexError('position {0} is out of map'.format(position))
+
+        run = bisect_right(self.outputs, position) - 1
+
+        return (self.inputs[run] +
+                (position - self.outputs[run]) * self.steps[run])
@@ -10,7 +10,15 @@
 
 '''
 
+from collections import deque
 from logging import getLogger
+from timeit import default_timer
+
+from .dispatch import compile_dispatch
+from .edits import EditScript
+from .source_map import SourceMap
+from .trace import POP, PUSH
+from .tree import ResultTree
 
 
 class StateDefault(object):
@@ -38,6 +46,8 @@ class StateDefault(object):
 
         stack (:class:`.StateStack`): stack that construct this instance
         result (:attr:`.container`): result of all calling
+        source_map (:class:`.SourceMap`): input offsets of :attr:`.result`
+            if stack is :attr:`.StateStack.tracking` else None
         done (bool): is state done for pop from stack?
 
     '''
@@ -62,6 +72,7 @@ class StateDefault(object):
         self.init_name = name
         self.done = False
         self.result = self.container()
+        self.source_map = SourceMap() if stack.tracking else None
         if not hasattr(self.result, '__len__'):
             self.log.error('\'%s\' hasn\'t \'__len__\' method',
                            self.container)
@@ -91,7 +102,12 @@ class StateDefault(object):
         '''Call wrapper
 
         This wrapper test chunk type and provide it to :meth:`.call`.
-        If :meth:`.call` return True, store chunk to result.
+        If :meth:`.call` return True, store chunk to result
+        and its :attr:`.StateStack.offset` to :attr:`.source_map`.
+        If stack collects :attr:`.StateStack.edits`, kept chunk
+        is not stored at all, only :attr:`.StateStack.cursor` is moved
+        to its end. Dropped chunk, that is not covered by any edit yet
+        (cursor is still at its start), is recorded as deletion.
 
         Parameters:
             chunk (:attr:`.container`): chunk of data
@@ -108,8 +124,81 @@ class StateDefault(object):
             raise TypeError('Chunk must be instance of \'{0}\''
                             .format(self.container))
 
-        if self.call(chunk):
+        keep = self.call(chunk)
+        if self.stack.edits is not None:
+            end = self.stack.offset + len(chunk)
+            if not keep and self.stack.cursor == self.stack.offset < end:
+                self.stack.edits.add(self.stack.offset, end)
+
+            self.stack.cursor = end
+        elif keep:
             self.result += chunk
+            if self.source_map is not None:
+                self.source_map.append(len(chunk), self.stack.offset)
+
+    def emit(self, data):
+        '''Store generated data to result
+
+        Use this method in :meth:`.call` to add data, that is not copied
+        from chunk. In :attr:`.source_map` it is mapped to offset
+        of current chunk. If stack collects :attr:`.StateStack.edits`,
+        data is inserted at :attr:`.StateStack.cursor`: before current chunk
+        or after it, if it has been already replaced, deleted or kept.
+
+        Parameters:
+            data (:attr:`.container`): data to store
+
+        '''
+
+        if self.stack.edits is not None:
+            self.stack.edits.add(self.stack.cursor, self.stack.cursor, data)
+
+            return
+
+        self.result += data
+        if self.source_map is not None:
+            self.source_map.append(len(data), self.stack.offset, 0)
+
+    def replace(self, chunk, data):
+        '''Replace current chunk by data
+
+        Use this method in :meth:`.call` and return its result.
+
+        Parameters:
+            chunk (:attr:`.container`): current chunk
+            data (:attr:`.container`): replacement
+
+        Returns:
+            bool: False, chunk mustn't be stored
+
+        '''
+
+        if self.stack.edits is not None:
+            self.stack.cursor = self.stack.offset + len(chunk)
+            self.stack.edits.add(self.stack.offset, self.stack.cursor, data)
+        else:
+            self.emit(data)
+
+        return False
+
+    def delete(self, chunk):
+        '''Delete current chunk
+
+        Use this method in :meth:`.call` and return its result.
+
+        Parameters:
+            chunk (:attr:`.container`): current chunk
+
+        Returns:
+            bool: False, chunk mustn't be stored
+
+        '''
+
+        if self.stack.edits is not None:
+            self.stack.cursor = self.stack.offset + len(chunk)
+            self.stack.edits.add(self.stack.offset, self.stack.cursor)
+
+        return False
 
     def call(self, _):
         '''Main method for state
@@ -130,6 +219,9 @@ class StateDefault(object):
         '''This method is called when children state has poped
 
         Redefine this method to modify and store result of child.
+        If stack is :attr:`.StateStack.tracking`, add generated data
+        by :meth:`.emit` and child result with its :attr:`.source_map`,
+        otherwise source map goes out of sync with result.
 
         Parameters:
             state (State): child state
@@ -137,12 +229,15 @@ class StateDefault(object):
         '''
 
         self.result += state.result
+        if self.source_map is not None:
+            self.source_map.extend(state.source_map)
 
     def end(self):
         '''This method is called when :attr:`.done` is True
 
         Redefine this method to modify result before it will be passed
-        to parent state.
+        to parent state. If stack is :attr:`.StateStack.tracking`, add data
+        by :meth:`.emit`, otherwise source map goes out of sync with result.
 
         '''
         pass
@@ -153,10 +248,15 @@ class StateSet(object):
 
     This is same as dict with test of values and default item.
 
+    Attributes:
+        version (int): counter of modifications, used to invalidate
+            anything built from this set
+
     '''
 
     def __init__(self):
         self.log = getLogger('StateStack.States')
+        self.version = 0
         self._states = {}
         self._states['default'] = StateDefault
 
@@ -165,6 +265,16 @@ class StateSet(object):
 
         return len(self._states)
 
+    def __iter__(self):
+        '''Iterate over registered names'''
+
+        return iter(self._states)
+
+    def __contains__(self, name):
+        '''Is there a state registered with this name?'''
+
+        return name in self._states
+
     def __getitem__(self, name):
         '''Get state class by :attr:`.StateDefault.real_name`
 
@@ -201,6 +311,104 @@ class StateSet(object):
             self.log.info('overwriting state %s', name)
 
         self._states[name] = value
+        self.version += 1
+
+
+class StateGraph(object):
+    '''Graph of states by followers
+
+    Analyze registered states: resolve names in
+    :attr:`.StateDefault.followers`, find followers that never been pushed
+    (their :meth:`.StateDefault.cond` is the inherited one, that always
+    return False), followers with unknown names and states that are not
+    reachable from roots. Followers of reachable states are stored
+    resolved and without dead ones.
+
+    Parameters:
+        states (:class:`.StateSet`): registered states
+        roots (list of str, optional): names of states pushed from outside,
+            default is None and all states are reachable
+
+    Attributes:
+        dangling (list of tuple): (state, follower) names pairs with
+            unknown follower
+        dead (list of tuple): (state, follower) names pairs with follower
+            that has default condition
+        unreachable (list of str): names of states not reachable from roots
+        resolved (dict): followers list id to pair of that list and list
+            of (name, StateClass) of live followers
+
+    '''
+
+    def __init__(self, states, roots=None):
+        self.states = states
+        self.dangling = []
+        self.dead = []
+        self.resolved = {}
+
+        if roots is None:
+            roots = list(states)
+
+        reachable = set()
+        queue = [name for name in roots if name in states]
+        while queue:
+            name = queue.pop()
+            if name in reachable:
+                continue
+
+            reachable.add(name)
+            followers = states[name].followers
+            live = []
+            for follower in followers:
+                if follower not in states:
+                    self.dangling.append((name, follower))
+                    state = states['default']
+                else:
+                    state = states[follower]
+                    queue.append(follower)
+
+                if is_dead(state):
+                    self.dead.append((name, follower))
+                else:
+                    live.append((follower, state))
+
+            self.resolved[id(followers)] = (followers, live)
+
+        self.unreachable = sorted(set(states) - reachable)
+
+    def followers(self, state):
+        '''Live followers of state
+
+        Parameters:
+            state (State): state instance
+
+        Returns:
+            list of tuple: (name, StateClass) pairs to test
+
+        '''
+
+        followers = state.followers
+        entry = self.resolved.get(id(followers))
+        if entry is not None and entry[0] is followers:
+
+            return entry[1]
+
+        return [(name, self.states[name]) for name in followers]
+
+
+def is_dead(state_class):
+    '''Has the state class default condition?
+
+    Parameters:
+        state_class (StateClass): state class to test
+
+    Returns:
+        bool: it couldn't be pushed as follower
+
+    '''
+
+    return (getattr(state_class.cond, '__func__', None) is
+            StateDefault.cond.__func__)
 
 
 class StateStack(object):
@@ -208,12 +416,64 @@ class StateStack(object):
 
     This is a main state machine realization.
 
+    Parameters:
+        compiled (bool, optional): use dispatch loop generated
+            by :func:`.dispatch.compile_dispatch` for registered states,
+            default is False
+        tracking (bool, optional): track input offsets of chunks
+            in :attr:`.StateDefault.source_map`, default is False
+        edits (bool, optional): collect modifications reported
+            by :meth:`.StateDefault.emit`, :meth:`.StateDefault.replace`
+            and :meth:`.StateDefault.delete` to :attr:`.edits` instead of
+            results, default is False. Chunks dropped by returning False
+            from :meth:`.StateDefault.call` without any of these methods
+            are recorded as deletions. It implies :attr:`.tracking`.
+        trace (:class:`.Trace`, optional): trace to record pushes, pops
+            and processed chunks, default is None
+        lookahead (int, optional): count of chunks that are buffered
+            before processing and available by :meth:`.peek`, default is 0
+        tree (bool, optional): build :attr:`.tree` of pushed states,
+            default is False. It implies :attr:`.tracking`.
+        root (str, optional): name of root state for :meth:`.batch`
+            and :meth:`.analyze`, default is 'default'
+        split (callable, optional): function to split text to chunks
+            for :meth:`.batch`, default is None and text is provided
+            as one chunk
+
+    Attributes:
+        offset (int): input offset of current chunk if :attr:`.tracking`
+        edits (:class:`.EditScript`): collected modifications or None
+        cursor (int): input offset, where data emitted in :attr:`.edits`
+            mode is inserted
+        tree (:class:`.ResultTree`): tree of pushed states with spans
+            from offset of chunk, when it was pushed, to the end of the last
+            chunk before pop, or None
+        graph (:class:`.StateGraph`): analyzed graph of registered states,
+            it is rebuilt on first call after registration
+
     '''
 
-    def __init__(self):
+    def __init__(self, compiled=False, tracking=False, edits=False,
+                 trace=None, lookahead=0, tree=False, root='default',
+                 split=None):
         self.log = getLogger('StateStack')
+        self.compiled = compiled
+        self.root = root
+        self.split = split
+        self.tracking = tracking or edits or tree
+        self.edits = EditScript() if edits else None
+        self.tree = ResultTree() if tree else None
+        self.trace = trace
+        self.lookahead = lookahead
+        self.offset = self.cursor = 0
+        self.graph = None
         self._stack = []
         self._states = StateSet()
+        self._roots = None
+        self._version = None
+        self._dispatch = None
+        self._position = 0
+        self._ahead = deque()
 
     def register(self, state_class):
         '''Register a state in machine
@@ -232,6 +492,50 @@ class StateStack(object):
 
         self._states[state_class.real_name] = state_class
 
+    @property
+    def states(self):
+        '''Registered states (:class:`.StateSet`)'''
+
+        return self._states
+
+    def analyze(self, roots=None):
+        '''Analyze graph of registered states
+
+        Build :class:`.StateGraph` that is used by :meth:`.__call__`
+        and report its problems to log. If stack is :attr:`.compiled`,
+        dispatch function is built for it too.
+
+        Parameters:
+            roots (list of str, optional): names of states that will be
+                pushed from outside, default is None and :attr:`.root`
+                is the only root. They are remembered for next rebuilds.
+
+        Returns:
+            :class:`.StateGraph`: analyzed graph
+
+        '''
+
+        self._roots = roots
+        self.graph = StateGraph(self._states,
+                                [self.root] if roots is None else roots)
+        self._version = self._states.version
+
+        for name, follower in self.graph.dangling:
+            self.log.warning('unknown follower \'%s\' of \'%s\'',
+                             follower, name)
+
+        for name, follower in self.graph.dead:
+            self.log.info('follower \'%s\' of \'%s\' is never pushed',
+                          follower, name)
+
+        for name in self.graph.unreachable:
+            self.log.info('state \'%s\' is unreachable', name)
+
+        if self.compiled:
+            self._dispatch = compile_dispatch(self.graph)
+
+        return self.graph
+
     def push(self, name):
         '''Push state in stack
 
@@ -246,8 +550,13 @@ class StateStack(object):
         '''
 
         self._stack.append(self._states[name](name, self))
+        if self.trace is not None:
+            self.trace.record(PUSH, name)
 
-    def __call__(self, chunk):
+        if self.tree is not None:
+            self.tree.open(name, self.offset)
+
+    def __call__(self, chunk, offset=None):
         '''Main method of machine
 
         At start test :meth:`.StateDefault.cond` for every state
@@ -257,34 +566,161 @@ class StateStack(object):
         has return True, :paramref:`.chunk` provided
         to :meth:`.StateDefault.__call__` of :attr:`.current`.
 
+        Followers are taken from :attr:`.graph`, so unknown followers
+        and ones that are never pushed are not tested. Graph is rebuilt
+        by :meth:`.analyze` when registered states change.
+
+        If stack is :attr:`.compiled`, the work is done by generated
+        dispatch function. If it couldn't be built or stack records
+        :attr:`.trace`, this interpreted loop is used.
+
         After test is :attr:`.current` :attr:`.StateDefault.done`
         and :meth:`.pop` if True.
 
+        If stack has :attr:`.lookahead`, chunk is buffered and the oldest
+        buffered chunk is processed, when there are enough chunks after it.
+        Call :meth:`.flush` after the last chunk.
+
         Parameters:
             chunk (:attr:`.StateDefault.container`): chunk of data
+            offset (int, optional): input offset of chunk if stack
+                is :attr:`.tracking`, default is None and chunk is
+                considered to follow the previous one
 
         Raises:
             LookupError: if stack is empty
 
         '''
 
+        if self.lookahead:
+            self._ahead.append((chunk, offset))
+            if len(self._ahead) <= self.lookahead:
+                return
+
+            chunk, offset = self._ahead.popleft()
+
+        if self.tracking:
+            self.offset = self._position if offset is None else offset
+            self._position = self.offset + len(chunk)
+            self.cursor = self.offset
+
+        if self._version != self._states.version:
+            self.analyze(self._roots)
+
+        if self._dispatch is not None and self.trace is None:
+            return self._dispatch(self, chunk)
+
         if not self._stack:
             self.log.error('stack is empty')
 
             raise LookupError('Stack stack is empty')
 
-        for state_name in self.current.followers:
-            state = self._states[state_name]
-            if state.cond(chunk, self.current):
+        follower = None
+        current = self._stack[-1]
+        for state_name, state in self.graph.followers(current):
+            if state.cond(chunk, current):
                 self.push(state_name)
+                follower = state_name
 
                 break
 
-        self.current(chunk)  # pylint: disable=not-callable
+        started = default_timer() if self.trace is not None else None
+        self._stack[-1](chunk)
+
+        if started is not None:
+            self.trace.chunk(chunk, follower, default_timer() - started)
 
         if self.current.done:
             self.pop()
 
+    def reset(self):
+        '''Clear stack to process new data
+
+        Registered states and analyzed :attr:`.graph` are kept,
+        :attr:`.edits` and :attr:`.tree` are started anew.
+
+        '''
+
+        del self._stack[:]
+        self._ahead.clear()
+        self.offset = self.cursor = self._position = 0
+        if self.edits is not None:
+            self.edits = EditScript()
+
+        if self.tree is not None:
+            self.tree = ResultTree()
+
+    def batch(self, texts, root=None, split=None):
+        '''Process many texts one by one
+
+        For every text stack is :meth:`.reset`, :paramref:`.root` is pushed
+        and all chunks of text are provided. After :meth:`.flush` all states
+        are poped.
+
+        Parameters:
+            texts (iterable): texts to process
+            root (str, optional): name of root state, default is None
+                and :attr:`.root` is used
+            split (callable, optional): function to split text to chunks,
+                default is None and :attr:`.split` is used
+
+        Yields:
+            :attr:`.StateDefault.container`: result of root state
+            or :class:`.EditScript` if stack collects :attr:`.edits`.
+            If stack builds :attr:`.tree`, pair of it and the tree is
+            yielded.
+
+        '''
+
+        root = self.root if root is None else root
+        split = self.split if split is None else split
+        for text in texts:
+            self.reset()
+            self.push(root)
+            state = self.current
+            for chunk in (text,) if split is None else split(text):
+                self(chunk)
+
+            self.flush()
+            while self._stack:
+                self.pop()
+
+            result = state.result if self.edits is None else self.edits
+            yield result if self.tree is None else (result, self.tree)
+
+    def peek(self, number=1):
+        '''Get upcoming chunk
+
+        Use it in :meth:`.StateDefault.cond` and :meth:`.StateDefault.call`
+        to look at chunks after the current one.
+
+        Parameters:
+            number (int, optional): position of chunk after current,
+                default is 1
+
+        Returns:
+            :attr:`.StateDefault.container`: chunk or None, if there is not
+            such chunk (at the end or beyond :attr:`.lookahead`)
+
+        '''
+
+        if 0 < number <= len(self._ahead):
+
+            return self._ahead[number - 1][0]
+
+        return None
+
+    def flush(self):
+        '''Process all buffered chunks'''
+
+        lookahead, self.lookahead = self.lookahead, 0
+        try:
+            while self._ahead:
+                self(*self._ahead.popleft())
+
+        finally:
+            self.lookahead = lookahead
+
     def pop(self):
         '''Pop state from stack
 
@@ -292,6 +728,9 @@ class StateStack(object):
         Finally, if stack is not empty, the poped state provided
         to :meth:`.StateDefault.back` of stack head.
 
+        Returns:
+            State: poped state or None if stack is empty
+
         '''
 
         if not len(self):
@@ -300,10 +739,29 @@ class StateStack(object):
             return None
 
         last_state = self._stack.pop()
+        if self.trace is not None:
+            self.trace.record(POP, last_state.init_name)
+
+        if self.tree is not None:
+            self.tree.close(self._position)
+
         last_state.end()
+        self._check_map(last_state)
 
         if self.current is not None:
             self.current.back(last_state)
+            self._check_map(self.current)
+
+        return last_state
+
+    def _check_map(self, state):
+        '''Log error if source map of state doesn't cover its result'''
+
+        if (state.source_map is not None and
+                state.source_map.length != len(state.result)):
+            self.log.error('source map of \'%s\' covers %d of %d, '
+                           'modify result by emit', state.init_name,
+                           state.source_map.length, len(state.result))
 
     def __len__(self):
         '''Length of stack'''
@@ -313,7 +771,7 @@ class StateStack(object):
     @property
     def current(self):
         '''The head of stack'''
-        if not len(self):
+        if not self._stack:
 
             return None
 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+
+import os
+import re
+import sys
+from io import StringIO
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from prettytypo import main
+from prettytypo.state_stack import StateDefault, StateStack
+from prettytypo.trace import Trace
+
+
+class UpperState(StateDefault):
+    real_name = 'upper'
+    container = str
+
+    def call(self, chunk):
+
+        return self.replace(chunk, chunk.upper() if chunk.strip()
+                            else chunk.replace(' ', '_'))
+
+
+def words(text):
+
+    return re.findall(r'\S+|\s+', text)
+
+
+def make_stack():
+    stack = StateStack(root='upper', split=words)
+    stack.register(UpperState)
+
+    return stack
+
+
+CONFIG = 'prettytypo.tests.test_cli:make_stack'
+
+
+def run(argv, data=''):
+    stdin, stdout = sys.stdin, sys.stdout
+    sys.stdin, sys.stdout = StringIO(data), StringIO()
+    try:
+        main(argv)
+
+        return sys.stdout.getvalue()
+
+    finally:
+        sys.stdin, sys.stdout = stdin, stdout
+
+
+class TestCli(TestCase):
+    def test_batch(self):
+        output = run(['batch', CONFIG, '--root', 'upper'], 'ab\ncd\n')
+
+        self.assertEqual(output, 'AB\nCD\n')
+
+    def test_configured(self):
+        output = run(['batch', CONFIG], 'ab  c\n')
+
+        self.assertEqual(output, 'AB__C\n')
+
+    def test_replay(self):
+        directory = mkdtemp()
+        self.addCleanup(rmtree, directory)
+        path = os.path.join(directory, 'trace.bin')
+        for started in (False, True):
+            stack = make_stack()
+            stack.trace = Trace()
+            stack.push('upper')
+            if started:
+                stack.trace = Trace()
+
+            stack('ab')
+            with open(path, 'wb') as stream:
+                stack.trace.dump(stream)
+
+            output = run(['replay', path, CONFIG])
+
+            self.assertTrue(output.startswith('upper\t1\t'))
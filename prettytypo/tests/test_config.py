@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+
+from unittest import TestCase
+
+from prettytypo.config import load_stack
+from prettytypo.state_stack import StateStack
+from prettytypo.tests.test_cli import CONFIG
+
+
+def make_edits():
+
+    return StateStack(edits=True)
+
+
+class TestConfig(TestCase):
+    def test_load_stack(self):
+
+        self.assertIsInstance(load_stack(CONFIG), StateStack)
+
+        with self.assertRaises(ValueError):
+            load_stack('prettytypo.tests.test_cli')
+
+    def test_text(self):
+
+        self.assertIsInstance(load_stack(CONFIG, True), StateStack)
+
+        config = 'prettytypo.tests.test_config:make_edits'
+        self.assertIsInstance(load_stack(config), StateStack)
+
+        with self.assertRaises(ValueError):
+            load_stack(config, True)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+
+from unittest import TestCase
+
+from prettytypo.dispatch import compile_dispatch, generate
+from prettytypo.state_stack import (StateDefault, StateGraph, StateSet,
+                                    StateStack)
+
+
+class FirstState(StateDefault):
+    real_name = 'first'
+    followers = ['second', 'unknown']
+
+
+class SecondState(StateDefault):
+    real_name = 'second'
+
+    @classmethod
+    def cond(cls, chunk, _):
+
+        return chunk[0] == 0
+
+    def call(self, chunk):
+        if chunk[0] == 1:
+            self.done = True
+
+        return True
+
+
+def run(compiled, chunks):
+    stack = StateStack(compiled=compiled)
+    stack.register(FirstState)
+    stack.register(SecondState)
+    stack.push('first')
+    names = []
+    for chunk in chunks:
+        stack(chunk)
+        names.append(stack.current.real_name)
+
+    return names, stack.current.result
+
+
+class TestDispatch(TestCase):
+    def test_generate(self):
+        states = StateSet()
+        states['first'] = FirstState
+        states['second'] = SecondState
+        source, namespace = generate(StateGraph(states))
+
+        self.assertIn('stack.push(N', source)
+        self.assertIn('second', namespace.values())
+        self.assertNotIn('unknown', namespace.values())
+
+    def test_cache(self):
+        states = StateSet()
+        states['first'] = FirstState
+
+        self.assertIs(compile_dispatch(StateGraph(states)),
+                      compile_dispatch(StateGraph(states)))
+
+    def test_fallback(self):
+        class BadGraph(object):
+            resolved = {0: ([], [(['second'], SecondState)])}
+
+        self.assertIsNone(compile_dispatch(BadGraph()))
+
+    def test_same_as_interpreted(self):
+        chunks = [[1], [0], [2], [1], [0], [1]]
+
+        self.assertEqual(run(True, chunks), run(False, chunks))
+
+    def test_reregister(self):
+        stack = StateStack(compiled=True)
+        stack.register(FirstState)
+        stack.push('first')
+        stack([0])
+        self.assertEqual(stack.current.real_name, 'first')
+        stack.register(SecondState)
+        stack([0])
+        self.assertEqual(stack.current.real_name, 'second')
+
+    def test_instance_followers(self):
+        stack = StateStack(compiled=True)
+        stack.register(SecondState)
+        stack.push('default')
+        stack.current.followers = ['second']
+        stack([0])
+
+        self.assertEqual(stack.current.real_name, 'second')
+
+    def test_empty(self):
+        stack = StateStack(compiled=True)
+        with self.assertRaises(LookupError):
+            stack([0])
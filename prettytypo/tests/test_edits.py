@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from prettytypo.edits import EditScript
+from prettytypo.state_stack import StateDefault, StateStack
+
+
+class TestEditScript(TestCase):
+    def setUp(self):
+        self.edits = EditScript()
+        self.edits.add(1, 2, b'-')
+        self.edits.add(2, 2, b'+')
+        self.edits.add(4, 5)
+        self.edits.add(6, 6, b'!')
+
+    def test_add(self):
+
+        self.assertEqual(len(self.edits), 3)
+        self.assertListEqual(list(self.edits), [(1, 2, b'-+'), (4, 5, None),
+                                                (6, 6, b'!')])
+
+        with self.assertRaises(ValueError):
+            self.edits.add(5, 7)
+
+        with self.assertRaises(ValueError):
+            self.edits.add(9, 8)
+
+    def test_apply(self):
+
+        self.assertEqual(self.edits.apply(b'abcdefg'), b'a-+cdf!g')
+
+    def test_to_patch(self):
+
+        self.assertDictEqual(self.edits.to_patch()[1],
+                             {'start': 4, 'end': 5, 'text': ''})
+
+    def test_apply_file(self):
+        directory = mkdtemp()
+        self.addCleanup(rmtree, directory)
+        path = os.path.join(directory, 'test.tex')
+        with open(path, 'wb') as target:
+            target.write(b'abcdefg')
+
+        self.edits.apply_file(path)
+        same = EditScript()
+        same.add(0, 1, b'A')
+        same.apply_file(path)
+        with open(path, 'rb') as source:
+
+            self.assertEqual(source.read(), b'A-+cdf!g')
+
+    def test_apply_text_file(self):
+        directory = mkdtemp()
+        self.addCleanup(rmtree, directory)
+        path = os.path.join(directory, 'test.tex')
+        with open(path, 'wb') as target:
+            target.write(u'а -- б\r\n'.encode('utf-8'))
+
+        edits = EditScript()
+        edits.add(1, 2, u'~')
+        edits.add(3, 4, u'—')
+
+        with self.assertRaises(TypeError):
+            edits.apply_file(path)
+
+        edits.apply_file(path, 'utf-8')
+        with open(path, 'rb') as source:
+
+            self.assertEqual(source.read().decode('utf-8'), u'а~-— б\r\n')
+
+    def test_apply_bom_file(self):
+        directory = mkdtemp()
+        self.addCleanup(rmtree, directory)
+        path = os.path.join(directory, 'test.tex')
+        edits = EditScript()
+        edits.add(4, 7, u'XYZ')
+        for encoding in ('utf-8-sig', 'utf-16'):
+            with open(path, 'wb') as target:
+                target.write(u'abc def'.encode(encoding))
+
+            edits.apply_file(path, encoding)
+            with open(path, 'rb') as source:
+
+                self.assertEqual(source.read(), u'abc XYZ'.encode(encoding))
+
+
+class TestEditMode(TestCase):
+    def test_edits(self):
+        class DashState(StateDefault):
+            real_name = 'dash'
+            container = str
+
+            @classmethod
+            def cond(cls, chunk, _):
+
+                return chunk in ('--', ' ')
+
+            def call(self, chunk):
+                self.done = True
+                if chunk == ' ':
+
+                    return self.delete(chunk)
+
+                self.emit('~')
+
+                return self.replace(chunk, '-')
+
+        class TextState(StateDefault):
+            real_name = 'text'
+            container = str
+            followers = ['dash']
+
+        source = 'a -- b'
+        stack = StateStack(edits=True)
+        stack.register(DashState)
+        stack.register(TextState)
+        stack.push('text')
+        for chunk in ('a', ' ', '--', ' ', 'b'):
+            stack(chunk)
+
+        self.assertEqual(stack.current.result, '')
+        self.assertEqual(stack.edits.apply(source), 'a~-b')
+
+    def test_emit_after_replace(self):
+        class MarkState(StateDefault):
+            real_name = 'mark'
+            container = str
+
+            def call(self, chunk):
+                if chunk == 'a':
+
+                    return self.replace(chunk, 'A')
+
+                return True
+
+            def end(self):
+                self.emit('!')
+
+        class TextState(StateDefault):
+            real_name = 'text'
+            container = str
+
+            def call(self, chunk):
+                self.stack.push('mark')
+                self.stack.current(chunk)
+                self.stack.pop()
+
+                return False
+
+        results = []
+        for edits in (False, True):
+            stack = StateStack(edits=edits)
+            stack.register(MarkState)
+            stack.register(TextState)
+            result = list(stack.batch(['ab'], 'text', list))[0]
+            results.append(result if not edits else result.apply('ab'))
+
+        self.assertListEqual(results, ['A!b!', 'A!b!'])
+
+    def test_drop(self):
+        class DropState(StateDefault):
+            real_name = 'drop'
+            container = str
+
+            def call(self, chunk):
+                if chunk == 'y':
+                    self.emit('Y')
+
+                return chunk not in 'xy'
+
+        results = []
+        for edits in (False, True):
+            stack = StateStack(edits=edits)
+            stack.register(DropState)
+            result = list(stack.batch(['axbyc'], 'drop', list))[0]
+            results.append(result if not edits else result.apply('axbyc'))
+
+        self.assertListEqual(results, ['abYc', 'abYc'])
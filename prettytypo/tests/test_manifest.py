@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+
+import io
+import json
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from prettytypo.config import load_stack
+from prettytypo.manifest import (MANIFEST, Manifest, fingerprint,
+                                 process_directory)
+from prettytypo.state_stack import StateDefault
+from prettytypo.tests.test_cli import CONFIG, run
+
+
+class TestManifest(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.addCleanup(rmtree, self.directory)
+        os.mkdir(os.path.join(self.directory, 'sub'))
+        for name, text in (('a.tex', u'ab'), ('sub/b.tex', u'cd'),
+                           ('c.txt', u'ef')):
+            self.write(name, text)
+
+    def write(self, name, text):
+        with io.open(os.path.join(self.directory, name), 'w',
+                     encoding='utf-8') as target:
+            target.write(text)
+
+    def read(self, name):
+        with io.open(os.path.join(self.directory, name),
+                     encoding='utf-8') as source:
+
+            return source.read()
+
+    def test_fingerprint(self):
+        stack = load_stack(CONFIG)
+        before = fingerprint(stack)
+
+        self.assertEqual(before, fingerprint(load_stack(CONFIG)))
+        self.assertEqual(before, fingerprint(stack, 'upper'))
+        self.assertNotEqual(before, fingerprint(stack, 'default'))
+
+        stack.split = list
+
+        self.assertNotEqual(before, fingerprint(stack))
+
+        class OtherState(StateDefault):
+            real_name = 'other'
+
+        stack.register(OtherState)
+
+        self.assertNotEqual(before, fingerprint(stack))
+
+    def test_manifest(self):
+        path = os.path.join(self.directory, MANIFEST)
+        manifest = Manifest(path)
+
+        self.assertIsNone(manifest.fingerprint)
+
+        manifest.fingerprint = 'test'
+        manifest.files['a.tex'] = '0'
+        manifest.save()
+
+        self.assertDictEqual(Manifest(path).files, {'a.tex': '0'})
+
+    def test_process(self):
+        processed = process_directory(self.directory, CONFIG, 'upper',
+                                      workers=1)
+
+        self.assertListEqual(processed, ['a.tex', os.path.join('sub',
+                                                               'b.tex')])
+        self.assertEqual(self.read('a.tex'), 'AB')
+        self.assertEqual(self.read('c.txt'), 'ef')
+        self.assertListEqual(process_directory(self.directory, CONFIG,
+                                               'upper', workers=1), [])
+
+        self.write('a.tex', u'gh')
+
+        self.assertListEqual(process_directory(self.directory, CONFIG,
+                                               'upper', workers=1),
+                             ['a.tex'])
+        self.assertEqual(self.read('a.tex'), 'GH')
+
+    def test_newlines(self):
+        path = os.path.join(self.directory, 'a.tex')
+        with open(path, 'wb') as target:
+            target.write(b'ab\r\ncd\r\n')
+
+        self.assertIn('a.tex', process_directory(self.directory, CONFIG,
+                                                 'upper', workers=1))
+
+        with open(path, 'rb') as source:
+
+            self.assertEqual(source.read(), b'AB\r\nCD\r\n')
+
+        with open(path, 'wb') as target:
+            target.write(b'AB\r\n')
+
+        self.assertListEqual(process_directory(self.directory, CONFIG,
+                                               workers=1), ['a.tex'])
+
+        self.assertListEqual(process_directory(self.directory, CONFIG,
+                                               workers=1), [])
+
+    def test_config_changed(self):
+        process_directory(self.directory, CONFIG, 'upper', workers=1)
+        path = os.path.join(self.directory, MANIFEST)
+        with io.open(path, encoding='utf-8') as source:
+            data = json.load(source)
+
+        data['fingerprint'] = 'old'
+        with io.open(path, 'w', encoding='utf-8') as target:
+            target.write(json.dumps(data))
+
+        self.assertEqual(len(process_directory(self.directory, CONFIG,
+                                               'upper', workers=1)), 2)
+
+    def test_root(self):
+        process_directory(self.directory, CONFIG, workers=1)
+        path = os.path.join(self.directory, MANIFEST)
+
+        self.assertListEqual(process_directory(self.directory, CONFIG,
+                                               'upper', workers=1), [])
+        self.assertNotEqual(Manifest(path).fingerprint,
+                            fingerprint(load_stack(CONFIG), 'default'))
+
+    def test_cli(self):
+        output = run(['dir', self.directory, CONFIG, '--root', 'upper',
+                      '--pattern', '*.txt', '--workers', '1'])
+
+        self.assertEqual(output, 'c.txt\n')
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+
+import os
+from io import BytesIO
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Thread
+from unittest import TestCase
+
+from prettytypo.server import (SLICE, Client, Server, recv_frame,
+                               send_frame)
+from prettytypo.tests.test_cli import CONFIG, run
+
+
+class TestFrames(TestCase):
+    def test_frames(self):
+        stream = BytesIO()
+        send_frame(stream, {'texts': ['a']})
+        send_frame(stream, [])
+        stream.seek(0)
+
+        self.assertDictEqual(recv_frame(stream), {'texts': ['a']})
+        self.assertListEqual(recv_frame(stream), [])
+        self.assertIsNone(recv_frame(stream))
+
+    def test_truncated(self):
+        with self.assertRaises(ValueError):
+            recv_frame(BytesIO(b'\0\0'))
+
+        with self.assertRaises(ValueError):
+            recv_frame(BytesIO(b'\0\0\0\2{'))
+
+
+class TestServer(TestCase):
+    def setUp(self):
+        directory = mkdtemp()
+        self.addCleanup(rmtree, directory)
+        self.path = os.path.join(directory, 'prettytypo.sock')
+        self.server = Server(self.path, CONFIG, 1)
+        thread = Thread(target=self.server.serve_forever)
+        thread.start()
+
+        def stop():
+            self.server.shutdown()
+            thread.join()
+            self.server.server_close()
+
+        self.addCleanup(stop)
+
+    def test_batch(self):
+        with Client(self.path) as client:
+
+            self.assertListEqual(list(client.batch(['ab', 'c'], 'upper')),
+                                 ['AB', 'C'])
+            self.assertListEqual(list(client.batch(iter(['d']), 'upper')),
+                                 ['D'])
+            self.assertListEqual(list(client.batch(['e f'])), ['E_F'])
+
+    def test_slices(self):
+        texts = [str(index) for index in range(SLICE * 2 + 1)]
+        with Client(self.path) as client:
+
+            self.assertListEqual(list(client.batch(texts, 'upper')), texts)
+
+    def test_error(self):
+        with Client(self.path) as client:
+            with self.assertRaises(RuntimeError):
+                list(client.batch([1], 'upper'))
+
+    def test_address_in_use(self):
+        with self.assertRaises(OSError):
+            Server(self.path, CONFIG, 1)
+
+        with Client(self.path) as client:
+
+            self.assertListEqual(list(client.batch(['a'], 'upper')), ['A'])
+
+    def test_edits(self):
+        path = os.path.join(os.path.dirname(self.path), 'edits.sock')
+        with self.assertRaises(ValueError):
+            Server(path, 'prettytypo.tests.test_config:make_edits', 1)
+
+        self.assertFalse(os.path.exists(path))
+
+    def test_cli(self):
+        output = run(['batch', '--connect', self.path, '--root', 'upper'],
+                     'ab\ncd\n')
+
+        self.assertEqual(output, 'AB\nCD\n')
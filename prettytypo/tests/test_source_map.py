@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+
+from unittest import TestCase
+
+from prettytypo.source_map import SourceMap
+from prettytypo.state_stack import StateDefault, StateStack
+
+
+class TestSourceMap(TestCase):
+    def test_append(self):
+        source_map = SourceMap()
+        source_map.append(3, 0)
+        source_map.append(2, 3)
+        source_map.append(0, 10)
+
+        self.assertEqual(len(source_map), 1)
+        self.assertEqual(source_map.length, 5)
+
+        source_map.append(1, 6)
+        source_map.append(2, 7, 0)
+        source_map.append(1, 7, 0)
+
+        self.assertListEqual(list(source_map),
+                             [(0, 0, 5, 1), (5, 6, 1, 1), (6, 7, 3, 0)])
+
+    def test_extend(self):
+        first = SourceMap()
+        first.append(2, 0)
+        second = SourceMap()
+        second.append(2, 2)
+        second.append(1, 5, 0)
+        first.extend(second)
+        first.extend(SourceMap())
+
+        self.assertListEqual(list(first), [(0, 0, 4, 1), (4, 5, 1, 0)])
+
+    def test_lookup(self):
+        source_map = SourceMap()
+        source_map.append(3, 10)
+        source_map.append(2, 20, 0)
+
+        self.assertEqual(source_map.lookup(0), 10)
+        self.assertEqual(source_map.lookup(2), 12)
+        self.assertEqual(source_map.lookup(4), 20)
+
+        with self.assertRaises(IndexError):
+            source_map.lookup(5)
+
+
+class TestTracking(TestCase):
+    def test_untracked(self):
+
+        self.assertIsNone(StateDefault().source_map)
+
+    def test_tracking(self):
+        class DashState(StateDefault):
+            real_name = 'dash'
+            followers = ['dash']
+
+            @classmethod
+            def cond(cls, chunk, _):
+
+                return chunk == ['-']
+
+            def call(self, _):
+                self.emit(['~', '-'])
+                self.done = True
+
+                return False
+
+        stack = StateStack(tracking=True)
+        stack.register(DashState)
+        stack.push('default')
+        stack.current.followers = ['dash']
+        stack(['a', 'b'])
+        stack(['-'])
+        stack(['c'], 5)
+        source_map = stack.current.source_map
+
+        self.assertListEqual(stack.current.result, list('ab~-c'))
+        self.assertListEqual([source_map.lookup(i) for i in range(5)],
+                             [0, 1, 2, 2, 5])
+
+    def test_out_of_sync(self):
+        class BadState(StateDefault):
+            real_name = 'bad'
+
+            def end(self):
+                self.result += ['!']
+
+        stack = StateStack(tracking=True)
+        stack.register(BadState)
+        stack.push('default')
+        stack.push('bad')
+        stack(['a'])
+        with self.assertLogs('StateStack', 'ERROR'):
+            stack.pop()
@@ -4,7 +4,8 @@
 
 from unittest import TestCase
 
-from prettytypo.state_stack import StateDefault, StateSet, StateStack
+from prettytypo.state_stack import (StateDefault, StateGraph, StateSet,
+                                    StateStack, is_dead)
 
 
 class TestStateDefault(TestCase):
@@ -81,6 +82,57 @@ class TestStateSet(TestCase):
         self.assertEqual(states['default'].real_name, 'test')
 
 
+class TestStateGraph(TestCase):
+    def setUp(self):
+        class FirstState(StateDefault):
+            real_name = 'first'
+            followers = ['second', 'third', 'unknown']
+
+        class SecondState(StateDefault):
+            real_name = 'second'
+
+            @classmethod
+            def cond(cls, chunk, _):
+
+                return chunk[0] == 0
+
+        class ThirdState(StateDefault):
+            real_name = 'third'
+
+        class LostState(SecondState):
+            real_name = 'lost'
+
+        self.states = StateSet()
+        for state in (FirstState, SecondState, ThirdState, LostState):
+            self.states[state.real_name] = state
+
+    def test_is_dead(self):
+
+        self.assertTrue(is_dead(StateDefault))
+        self.assertFalse(is_dead(self.states['second']))
+        self.assertFalse(is_dead(self.states['lost']))
+
+    def test_analyze(self):
+        graph = StateGraph(self.states, ['first'])
+
+        self.assertListEqual(graph.dangling, [('first', 'unknown')])
+        self.assertListEqual(graph.dead, [('first', 'third'),
+                                          ('first', 'unknown')])
+        self.assertListEqual(graph.unreachable, ['default', 'lost'])
+
+    def test_followers(self):
+        graph = StateGraph(self.states)
+        state = self.states['first']()
+
+        self.assertListEqual(graph.followers(state),
+                             [('second', self.states['second'])])
+
+        state.followers = ['lost']
+
+        self.assertListEqual(graph.followers(state),
+                             [('lost', self.states['lost'])])
+
+
 class TestMachine(TestCase):
     def test_init(self):
         stack = StateStack()
@@ -104,6 +156,29 @@ class TestMachine(TestCase):
         with self.assertRaises(TypeError):
             stack.register(list)
 
+    def test_analyze(self):
+        stack = StateStack()
+        stack.push('default')
+        stack([0])
+        graph = stack.graph
+
+        self.assertIsInstance(graph, StateGraph)
+        self.assertIs(stack.analyze(['default']), stack.graph)
+        self.assertListEqual(stack.graph.unreachable, [])
+
+    def test_analyze_root(self):
+        class LostState(StateDefault):
+            real_name = 'lost'
+
+        stack = StateStack()
+        stack.register(LostState)
+        stack.push('default')
+        stack([0])
+
+        self.assertListEqual(stack.graph.unreachable, ['lost'])
+        self.assertListEqual(stack.analyze(['lost']).unreachable,
+                             ['default'])
+
     def test_push(self):
         stack = StateStack()
         stack.push('state_name')
@@ -135,6 +210,72 @@ class TestMachine(TestCase):
 
         self.assertListEqual(stack.current.result, [0])
 
+    def test_lookahead(self):
+        class SpaceState(StateDefault):
+            real_name = 'space'
+            container = str
+
+            @classmethod
+            def cond(cls, chunk, state):
+
+                return chunk == ' ' and state.stack.peek() == '--'
+
+            def call(self, _):
+                self.done = True
+
+                return self.replace(' ', '~')
+
+        class TextState(StateDefault):
+            real_name = 'text'
+            container = str
+            followers = ['space']
+
+        stack = StateStack(lookahead=1)
+        stack.register(SpaceState)
+        stack.register(TextState)
+        stack.push('text')
+        for chunk in ('a', ' ', '--', ' ', 'b'):
+            stack(chunk)
+
+        self.assertEqual(stack.current.result, 'a~-- ')
+        self.assertEqual(stack.peek(), 'b')
+        self.assertIsNone(stack.peek(2))
+
+        stack.flush()
+
+        self.assertEqual(stack.current.result, 'a~-- b')
+        self.assertEqual(stack.lookahead, 1)
+
+    def test_reset(self):
+        stack = StateStack(edits=True)
+        stack.push('default')
+        stack([0])
+        edits = stack.edits
+        stack.reset()
+
+        self.assertEqual(len(stack), 0)
+        self.assertIsNot(stack.edits, edits)
+
+    def test_batch(self):
+        class UpperState(StateDefault):
+            real_name = 'upper'
+            container = str
+
+            def call(self, chunk):
+
+                return self.replace(chunk, chunk.upper())
+
+        stack = StateStack()
+        stack.register(UpperState)
+        results = stack.batch(['ab', 'c'], 'upper', list)
+
+        self.assertListEqual(list(results), ['AB', 'C'])
+
+        stack = StateStack(root='upper', split=list)
+        stack.register(UpperState)
+
+        self.assertListEqual(list(stack.batch(['ab'])), ['AB'])
+
     def test_current(self):
         stack = StateStack()
 
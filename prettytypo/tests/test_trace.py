@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+
+from io import BytesIO
+from unittest import TestCase
+
+from prettytypo.state_stack import StateDefault, StateStack
+from prettytypo.trace import CHUNK, POP, PUSH, Trace, replay, synthetic
+
+
+class GroupState(StateDefault):
+    real_name = 'group'
+    container = str
+    followers = ['group']
+
+    @classmethod
+    def cond(cls, chunk, _):
+
+        return chunk == '{'
+
+    def call(self, chunk):
+        self.done = chunk == '}'
+
+        return True
+
+
+class TextState(GroupState):
+    real_name = 'text'
+
+    def call(self, _):
+
+        return True
+
+
+def make_stack(trace=None):
+    stack = StateStack(trace=trace, root='text')
+    stack.register(GroupState)
+    stack.register(TextState)
+
+    return stack
+
+
+class TestTrace(TestCase):
+    def test_record(self):
+        trace = Trace()
+        trace.record(PUSH, 'text')
+        trace.chunk('abc', 'group', 1e-6)
+        trace.record(POP, 'text')
+
+        self.assertEqual(len(trace), 3)
+        self.assertListEqual(list(trace.records()),
+                             [(PUSH, 'text', 0, None, 0),
+                              (CHUNK, 'str', 3, 'group', 1000),
+                              (POP, 'text', 0, None, 0)])
+
+    def test_ring(self):
+        with self.assertRaises(ValueError):
+            Trace(0)
+
+        trace = Trace(2)
+        for name in ('a', 'b', 'c'):
+            trace.record(PUSH, name)
+
+        self.assertListEqual([record[1] for record in trace.records()],
+                             ['b', 'c'])
+
+    def test_dump(self):
+        trace = Trace(2)
+        for name in ('a', 'b', 'c'):
+            trace.record(PUSH, name)
+
+        stream = BytesIO()
+        trace.dump(stream)
+        stream.seek(0)
+        loaded = Trace.load(stream)
+
+        self.assertListEqual(list(loaded.records()), list(trace.records()))
+
+        with self.assertRaises(ValueError):
+            Trace.load(BytesIO(b'\0' * 16))
+
+        for size in (0, 5, len(stream.getvalue()) - 1):
+            with self.assertRaises(ValueError):
+                Trace.load(BytesIO(stream.getvalue()[:size]))
+
+    def test_synthetic(self):
+
+        self.assertEqual(synthetic(str, 2), '  ')
+        self.assertEqual(synthetic(list, 1), [' '])
+
+    def test_stack(self):
+        trace = Trace()
+        stack = make_stack(trace)
+        stack.push('text')
+        for chunk in ('a', '{', 'b', '}', 'c'):
+            stack(chunk)
+
+        events = [record[:4] for record in trace.records()]
+
+        self.assertListEqual(events, [
+            (PUSH, 'text', 0, None),
+            (CHUNK, 'str', 1, None),
+            (PUSH, 'group', 0, None),
+            (CHUNK, 'str', 1, 'group'),
+            (CHUNK, 'str', 1, None),
+            (CHUNK, 'str', 1, None),
+            (POP, 'group', 0, None),
+            (CHUNK, 'str', 1, None),
+        ])
+
+        replayed = make_stack()
+        profile = replay(trace, replayed)
+
+        self.assertEqual(len(replayed), 1)
+        self.assertEqual(replayed.current.result, ' ' * 5)
+        self.assertListEqual(sorted(profile), ['group', 'text'])
+        self.assertEqual(profile['group'][0], 3)
+
+    def test_wrapped(self):
+        trace = Trace(4)
+        stack = make_stack(trace)
+        stack.push('text')
+        for chunk in ('{', '{', 'a', 'b', '}', 'c', '}', 'd'):
+            stack(chunk)
+
+        replayed = make_stack()
+        profile = replay(trace, replayed)
+
+        self.assertEqual(len(replayed), 1)
+        self.assertEqual(profile['group'][0], 2)
+        self.assertEqual(profile['text'][0], 1)
+
+    def test_started(self):
+        stack = make_stack()
+        stack.push('text')
+        stack('a')
+        stack.trace = Trace()
+        for chunk in ('{', 'b', '}', 'c'):
+            stack(chunk)
+
+        replayed = make_stack()
+        replayed.push('group')
+        profile = replay(stack.trace, replayed)
+
+        self.assertEqual(len(replayed), 1)
+        self.assertEqual(replayed.current.init_name, 'text')
+        self.assertEqual(profile['text'][0], 1)
+        self.assertEqual(profile['group'][0], 3)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+
+from unittest import TestCase
+
+from prettytypo.state_stack import StateDefault, StateStack
+from prettytypo.tree import ResultTree
+
+
+class GroupState(StateDefault):
+    real_name = 'group'
+    container = str
+    followers = ['group']
+
+    @classmethod
+    def cond(cls, chunk, _):
+
+        return chunk == '{'
+
+    def call(self, chunk):
+        self.done = chunk == '}'
+
+        return True
+
+
+class TestResultTree(TestCase):
+    def setUp(self):
+        self.tree = ResultTree()
+        self.tree.open('text', 0)
+        self.tree.open('group', 1)
+        self.tree.close(3)
+        self.tree.open('math', 4)
+        self.tree.open('group', 5)
+        self.tree.close(6)
+        self.tree.close(7)
+        self.tree.close(8)
+
+    def test_tree(self):
+
+        self.assertEqual(len(self.tree), 4)
+        self.assertListEqual(self.tree.table, ['text', 'group', 'math'])
+        self.assertTupleEqual(self.tree.node(2), ('math', 4, 7))
+        self.assertListEqual(list(self.tree.parents), [-1, 0, 0, 2])
+        self.assertIsNone(self.tree.close(9))
+
+    def test_children(self):
+
+        self.assertListEqual(list(self.tree.children()), [0])
+        self.assertListEqual(list(self.tree.children(0)), [1, 2])
+        self.assertListEqual(list(self.tree.children(2)), [3])
+        self.assertListEqual(list(self.tree.children(3)), [])
+
+    def test_json(self):
+        loaded = ResultTree.from_json(self.tree.to_json())
+
+        self.assertEqual(loaded.to_bytes(), self.tree.to_bytes())
+
+    def test_bytes(self):
+        loaded = ResultTree.from_bytes(self.tree.to_bytes())
+
+        self.assertListEqual(loaded.table, self.tree.table)
+        self.assertListEqual(list(loaded.lasts), list(self.tree.lasts))
+
+        with self.assertRaises(ValueError):
+            ResultTree.from_bytes(b'\0' * 16)
+
+        with self.assertRaises(ValueError):
+            ResultTree.from_bytes(self.tree.to_bytes()[:-1])
+
+        self.tree.ends[0] = 1 << 40
+        loaded = ResultTree.from_bytes(self.tree.to_bytes())
+
+        self.assertEqual(loaded.ends[0], 1 << 40)
+
+    def test_stack(self):
+        stack = StateStack(tree=True)
+        stack.register(GroupState)
+        results = list(stack.batch(['a{b{c}}d', '{}'], 'group', list))
+        result, tree = results[0]
+
+        self.assertEqual(result, 'a{b{c}}d')
+        self.assertEqual(len(results[1][1]), 2)
+
+        self.assertListEqual([tree.node(index) for index in range(len(tree))],
+                             [('group', 0, 8), ('group', 1, 7),
+                              ('group', 3, 6)])
@@ -0,0 +1,19 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+
+from unittest import TestCase
+
+from prettytypo.tests.test_cli import CONFIG
+from prettytypo.worker import init_worker, work
+
+
+class TestWorker(TestCase):
+    def test_work(self):
+        init_worker(CONFIG)
+
+        self.assertListEqual(work(None, ['ab c', 'd']), ['AB_C', 'D'])
+
+    def test_edits(self):
+        with self.assertRaises(ValueError):
+            init_worker('prettytypo.tests.test_config:make_edits')
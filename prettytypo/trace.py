@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+.. module:: trace
+   :platform: Independent
+   :synopsis: Binary trace of state machine and its replay.
+
+.. moduleauthor:: Evgeniy Bastrykov <vporoshok@gmail.com>
+
+Trace keeps fixed size records of pushes, pops and chunks (type
+and length of chunk, pushed follower and time of processing by state,
+without testing of followers conditions) without data itself. It can be
+dumped, loaded and replayed on stack with same states to reproduce
+transitions and timings without original text.
+
+'''
+
+from struct import Struct, error
+from timeit import default_timer
+
+
+MAGIC = b'PTTR'
+
+CHUNK, PUSH, POP = range(3)
+
+NONE = 0xFFFF
+
+RECORD = Struct('<BHIHI')
+
+HEADER = Struct('<4sHI')
+
+NAME = Struct('<H')
+
+
+class Trace(object):
+    '''Trace of state machine
+
+    Records are written to ring buffer, so only last :paramref:`.size`
+    records are kept.
+
+    Parameters:
+        size (int, optional): count of kept records, default is 65536.
+            If None, all records are kept.
+
+    Attributes:
+        names (list of str): names of states and chunk types, records
+            refer to them by index
+
+    Raises:
+        ValueError: if size is less than 1
+
+    '''
+
+    def __init__(self, size=65536):
+        if size is not None and size < 1:
+
+            raise ValueError('trace size must be positive')
+
+        self.size = size
+        self.names = []
+        self._ids = {}
+        self._count = 0
+        self._buffer = bytearray(RECORD.size * (size or 0))
+
+    def __len__(self):
+        '''Count of kept records'''
+
+        if self.size is None:
+
+            return self._count
+
+        return min(self._count, self.size)
+
+    def _id(self, name):
+        '''Index of name in :attr:`.names`'''
+
+        if name is None:
+
+            return NONE
+
+        if name not in self._ids:
+            self._ids[name] = len(self.names)
+            self.names.append(name)
+
+        return self._ids[name]
+
+    def record(self, event, name, length=0, follower=None, elapsed=0):
+        '''Write record
+
+        Parameters:
+            event (int): CHUNK, PUSH or POP
+            name (str): state name or chunk type name
+            length (int, optional): chunk length
+            follower (str, optional): pushed follower name
+            elapsed (float, optional): processing time in seconds
+
+        '''
+
+        record = (event, self._id(name), length, self._id(follower),
+                  min(int(elapsed * 1e9), 0xFFFFFFFF))
+        if self.size is None:
+            self._buffer += RECORD.pack(*record)
+        else:
+            RECORD.pack_into(self._buffer,
+                             RECORD.size * (self._count % self.size),
+                             *record)
+
+        self._count += 1
+
+    def chunk(self, chunk, follower, elapsed):
+        '''Write record of processed chunk
+
+        Parameters:
+            chunk (container): chunk of data
+            follower (str): pushed follower name or None
+            elapsed (float): processing time in seconds
+
+        '''
+
+        self.record(CHUNK, type(chunk).__name__, len(chunk), follower,
+                    elapsed)
+
+    def records(self):
+        '''Iterate over kept records from oldest
+
+        Yields:
+            tuple: event, name, length, follower and elapsed nanoseconds,
+            names are resolved
+
+        '''
+
+        start = 0
+        if self.size is not None and self._count > self.size:
+            start = self._count % self.size
+
+        for index in range(len(self)):
+            position = RECORD.size * ((start + index) % (len(self) or 1))
+            event, name, length, follower, elapsed = RECORD.unpack_from(
+                self._buffer, position)
+
+            yield (event, self.names[name], length,
+                   None if follower == NONE else self.names[follower],
+                   elapsed)
+
+    def dump(self, stream):
+        '''Write trace to binary stream
+
+        Parameters:
+            stream (file): opened in binary mode
+
+        '''
+
+        stream.write(HEADER.pack(MAGIC, len(self.names), len(self)))
+        for name in self.names:
+            data = name.encode('utf-8')
+            stream.write(NAME.pack(len(data)))
+            stream.write(data)
+
+        if self.size is not None and self._count > self.size:
+            middle = RECORD.size * (self._count % self.size)
+            stream.write(bytes(self._buffer[middle:]))
+            stream.write(bytes(self._buffer[:middle]))
+        else:
+            stream.write(bytes(self._buffer[:RECORD.size * len(self)]))
+
+    @classmethod
+    def load(cls, stream):
+        '''Read trace from binary stream
+
+        Parameters:
+            stream (file): opened in binary mode
+
+        Returns:
+            :class:`.Trace`: loaded trace with all records
+
+        Raises:
+            ValueError: if stream is not a trace or it is truncated
+
+        '''
+
+        try:
+            magic, names, count = HEADER.unpack(stream.read(HEADER.size))
+            if magic != MAGIC:
+
+                raise ValueError('stream is not a trace')
+
+            trace = cls(None)
+            for _ in range(names):
+                size, = NAME.unpack(stream.read(NAME.size))
+                trace._id(stream.read(size).decode('utf-8'))
+
+        except error as err:
+
+            raise ValueError('trace is truncated: {0}'.format(err))
+
+        trace._buffer = bytearray(stream.read(RECORD.size * count))
+        trace._count = count
+        if len(trace._buffer) != RECORD.size * count:
+
+            raise ValueError('trace is truncated')
+
+        return trace
+
+
+def synthetic(container, length):
+    '''Chunk of container type and given length without real data'''
+
+    try:
+
+        return container(' ' * length)
+
+    except TypeError:
+
+        return container(b' ' * length)
+
+
+def replay(trace, stack):
+    '''Replay trace on stack
+
+    Pushes and pops are repeated as recorded and every chunk is replaced
+    by synthetic one of same length, that is provided to current state.
+    Both recorded and replayed time cover only processing by state.
+    Stack must have same states registered, it is :meth:`.reset`
+    and all states are pushed by replay. If kept records start inside
+    nested states (ring buffer has wrapped), these states are restored
+    by their pops. If chunks are recorded outside of any restored state
+    (trace has wrapped or has been started after the root push),
+    :attr:`.StateStack.root` is pushed under them.
+
+    Parameters:
+        trace (:class:`.Trace`): recorded trace
+        stack (:class:`.StateStack`): stack to replay on
+
+    Returns:
+        dict: state name to list of chunks count, recorded and replayed
+        nanoseconds
+
+    '''
+
+    nested, depth, bottom = [], 0, 0
+    for event, name, _, _, _ in trace.records():
+        if event == PUSH:
+            depth += 1
+        elif event == POP:
+            depth -= 1
+            if -depth > len(nested):
+                nested.append(name)
+        else:
+            bottom = max(bottom, 1 - depth)
+
+    stack.reset()
+    if bottom > len(nested):
+        stack.push(stack.root)
+
+    for name in reversed(nested):
+        stack.push(name)
+
+    profile = {}
+    for event, name, length, _, elapsed in trace.records():
+        if event == PUSH:
+            stack.push(name)
+        elif event == POP:
+            stack.pop()
+        else:
+            state = stack.current
+            chunk = synthetic(state.container, length)
+            started = default_timer()
+            state(chunk)
+            replayed = int((default_timer() - started) * 1e9)
+            stats = profile.setdefault(state.init_name, [0, 0, 0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] += replayed
+
+    return profile
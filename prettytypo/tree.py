@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+.. module:: tree
+   :platform: Independent
+   :synopsis: Tree of states stored in parallel arrays.
+
+.. moduleauthor:: Evgeniy Bastrykov <vporoshok@gmail.com>
+
+Every pushed state is a node with name and input span. Nodes are stored
+in order of pushes (preorder), so the subtree of node is the range from it
+to its last descendant. Names are kept in a table and nodes refer to them
+by index.
+
+'''
+
+import json
+from array import array
+from struct import Struct, error
+
+
+MAGIC = b'PTRT'
+
+HEADER = Struct('<4sHI')
+
+NAME = Struct('<H')
+
+FIELDS = ('names', 'starts', 'ends', 'parents', 'lasts')
+
+TYPES = {'names': 'H', 'starts': 'q', 'ends': 'q', 'parents': 'q',
+         'lasts': 'q'}
+
+
+class ResultTree(object):
+    '''Tree of states
+
+    Attributes:
+        table (list of str): names of nodes
+        names (array): index of name in :attr:`.table` for every node
+        starts (array): input offset of span start for every node
+        ends (array): input offset of span end for every node
+        parents (array): index of parent node or -1 for every node
+        lasts (array): index of the last descendant for every node
+
+    '''
+
+    def __init__(self):
+        self.table = []
+        self.names = array('H')
+        self.starts = array('l')
+        self.ends = array('l')
+        self.parents = array('l')
+        self.lasts = array('l')
+        self._ids = {}
+        self._open = []
+
+    def __len__(self):
+        '''Count of nodes'''
+
+        return len(self.names)
+
+    def open(self, name, start):
+        '''Add node as child of the last open node
+
+        Parameters:
+            name (str): name of node
+            start (int): input offset of span start
+
+        Returns:
+            int: index of node
+
+        '''
+
+        if name not in self._ids:
+            self._ids[name] = len(self.table)
+            self.table.append(name)
+
+        index = len(self)
+        self.names.append(self._ids[name])
+        self.starts.append(start)
+        self.ends.append(start)
+        self.parents.append(self._open[-1] if self._open else -1)
+        self.lasts.append(index)
+        self._open.append(index)
+
+        return index
+
+    def close(self, end):
+        '''Close the last open node
+
+        Parameters:
+            end (int): input offset of span end
+
+        Returns:
+            int: index of node or None if there is not open node
+
+        '''
+
+        if not self._open:
+            return None
+
+        index = self._open.pop()
+        self.ends[index] = end
+        self.lasts[index] = len(self) - 1
+
+        return index
+
+    def node(self, index):
+        '''Node by index
+
+        Parameters:
+            index (int): index of node
+
+        Returns:
+            tuple: name, start and end of node
+
+        '''
+
+        return (self.table[self.names[index]], self.starts[index],
+                self.ends[index])
+
+    def children(self, index=-1):
+        '''Iterate over children of node
+
+        Parameters:
+            index (int, optional): index of node, default is -1 and roots
+                are iterated
+
+        Yields:
+            int: index of child node
+
+        '''
+
+        child, last = index + 1, len(self) - 1
+        if index >= 0:
+            last = self.lasts[index]
+
+        while child <= last:
+            yield child
+            child = self.lasts[child] + 1
+
+    def to_json(self):
+        '''Serialize tree to compact JSON
+
+        Returns:
+            str: object with names table and parallel lists of nodes
+
+        '''
+
+        data = dict((field, list(getattr(self, field))) for field in FIELDS)
+        data['table'] = self.table
+
+        return json.dumps(data, separators=(',', ':'), sort_keys=True)
+
+    @classmethod
+    def from_json(cls, data):
+        '''Load tree from JSON
+
+        Parameters:
+            data (str): result of :meth:`.to_json`
+
+        Returns:
+            :class:`.ResultTree`: loaded tree
+
+        '''
+
+        data = json.loads(data)
+        tree = cls()
+        tree.table = data['table']
+        for field in FIELDS:
+            getattr(tree, field).extend(data[field])
+
+        return tree
+
+    def to_bytes(self):
+        '''Serialize tree to binary
+
+        Returns:
+            bytes: header, names table and arrays in little-endian,
+            offsets and indexes are 8 bytes long
+
+        '''
+
+        parts = [HEADER.pack(MAGIC, len(self.table), len(self))]
+        for name in self.table:
+            data = name.encode('utf-8')
+            parts.append(NAME.pack(len(data)))
+            parts.append(data)
+
+        for field in FIELDS:
+            values = getattr(self, field)
+            parts.append(Struct('<{0}{1}'.format(
+                len(values), TYPES[field])).pack(*values))
+
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''Load tree from binary
+
+        Parameters:
+            data (bytes): result of :meth:`.to_bytes`
+
+        Returns:
+            :class:`.ResultTree`: loaded tree
+
+        Raises:
+            ValueError: if data is not a tree or it is truncated
+
+        '''
+
+        try:
+            magic, names, count = HEADER.unpack_from(data)
+            if magic != MAGIC:
+
+                raise ValueError('data is not a tree')
+
+            tree = cls()
+            position = HEADER.size
+            for _ in range(names):
+                size, = NAME.unpack_from(data, position)
+                position += NAME.size
+                tree.table.append(
+                    data[position:position + size].decode('utf-8'))
+                position += size
+
+            for field in FIELDS:
+                values = Struct('<{0}{1}'.format(count, TYPES[field]))
+                getattr(tree, field).extend(values.unpack_from(data,
+                                                               position))
+                position += values.size
+
+        except error as err:
+
+            raise ValueError('tree is truncated: {0}'.format(err))
+
+        return tree
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+.. module:: worker
+   :platform: Independent
+   :synopsis: Worker processes with configured stack.
+
+.. moduleauthor:: Evgeniy Bastrykov <vporoshok@gmail.com>
+
+Every worker process of a pool builds configured :class:`.StateStack`
+once by :func:`.init_worker` and reuses it in every :func:`.work` call.
+
+'''
+
+from .config import load_stack
+
+
+_STACK = None
+
+
+def init_worker(config):
+    '''Build stack of worker process
+
+    Parameters:
+        config (str): ``package.module:factory``
+
+    '''
+
+    global _STACK  # pylint: disable=global-statement
+
+    _STACK = load_stack(config, True)
+
+
+def work(root, texts):
+    '''Typeset texts in worker process
+
+    Parameters:
+        root (str): name of root state or None for configured one
+        texts (list of str): texts to process
+
+    Returns:
+        list of str: results
+
+    '''
+
+    return [''.join(result) for result in _STACK.batch(texts, root)]